@@ -8,34 +8,87 @@ import os
 import sys
 import logging
 import json
+import time
+import hashlib
+import tempfile
+import concurrent.futures
+from operator import itemgetter
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import openai
 from openai import OpenAI
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BATCH_POLL_INITIAL_DELAY = 5
+BATCH_POLL_MAX_DELAY = 300
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+GITHUB_MAX_WORKERS = 8
+CHARS_PER_TOKEN = 4
+ENTRY_FIELDS = itemgetter("line_number", "category", "original_text", "suggested_text")
+COMMENT_TEMPLATE = "**{label}**: `{original}`\n**Suggestion**: `{suggested}`".format
+CATEGORY_LABELS = {
+    "spelling issue": "Spelling issue",
+    "grammar issue": "Grammar issue",
+    "both": "Both"
+}
+
+
+def json_loads(data):
+    """Parse JSON with orjson when available, falling back to the standard library."""
+    if orjson is not None:
+        return orjson.loads(data)  # pylint: disable=no-member
+    return json.loads(data)
+
+
+def json_dumps(obj):
+    """Serialize an object to JSON bytes with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)  # pylint: disable=no-member
+    return json.dumps(obj).encode('utf-8')
+
+
+def strip_code_fence(text):
+    """Remove a surrounding Markdown code fence (```json ... ```) from model output."""
+    text = text.strip()
+    text = text.removeprefix("```json").removeprefix("```").strip()
+    return text.removesuffix("```").strip()
+
+
 class Config:
     """Configuration class to read and validate environment variables."""
 
     def __init__(self):
+        self.env = dict(os.environ)
         self.github = {
-            "repository": os.getenv("INPUT_GITHUB_REPOSITORY"),
-            "token": os.getenv("INPUT_GITHUB_TOKEN"),
-            "pr_number": os.getenv("INPUT_PR_NUMBER"),
-            "files": os.getenv("INPUT_FILES").split(',')
+            "repository": self.require("INPUT_GITHUB_REPOSITORY"),
+            "token": self.require("INPUT_GITHUB_TOKEN"),
+            "pr_number": self.require("INPUT_PR_NUMBER"),
+            "files": self.require("INPUT_FILES", lambda value: value.split(','))
         }
         self.spell_check = {
-            "failOnSpelling": self.str_to_bool(os.getenv("INPUT_FAIL_ON_SPELLING")),
-            "failOnGrammar": self.str_to_bool(os.getenv("INPUT_FAIL_ON_GRAMMAR")),
-            "default_language": os.getenv("INPUT_DEFAULT_LANGUAGE")
+            "failOnSpelling": self.str_to_bool(self.env.get("INPUT_FAIL_ON_SPELLING")),
+            "failOnGrammar": self.str_to_bool(self.env.get("INPUT_FAIL_ON_GRAMMAR")),
+            "default_language": self.env.get("INPUT_DEFAULT_LANGUAGE"),
+            "concurrency": self.optional("INPUT_CONCURRENCY", "8", self.positive_int),
+            "use_batch": self.str_to_bool(self.env.get("INPUT_USE_BATCH")),
+            "batch_timeout": self.optional("INPUT_BATCH_TIMEOUT", "240", self.positive_int),
+            "batch_chars": self.optional("INPUT_BATCH_CHARS", "12000", self.positive_int),
+            "cache_dir": os.path.expanduser(self.env.get("INPUT_CACHE_DIR", "~/.cache/spellcheck"))
         }
         self.openai = {
-            "api_key": os.getenv("INPUT_OPENAI_API_KEY"),
-            "model": os.getenv("INPUT_OPENAI_MODEL"),
-            "max_tokens": int(os.getenv("INPUT_MODEL_MAX_TOKEN"))
+            "api_key": self.require("INPUT_OPENAI_API_KEY"),
+            "model": self.require("INPUT_OPENAI_MODEL"),
+            "max_tokens": self.require("INPUT_MODEL_MAX_TOKEN", self.positive_int),
+            "seed": self.optional("INPUT_SEED", "42", int)
         }
         self.log = {
-            "log_level": os.getenv("INPUT_LOG_LEVEL")
+            "log_level": self.env.get("INPUT_LOG_LEVEL")
         }
-        self.validate()
 
     def str_to_bool(self, value):
         """Convert string to boolean."""
@@ -43,17 +96,32 @@ class Config:
             return False
         return value.lower() == "true"
 
-    def validate(self):
-        """Validate required environment variables."""
-        if not all(self.github.values()):
-            logging.error(
-                "GITHUB_REPOSITORY, GITHUB_TOKEN, PR_NUMBER, and INPUT_FILES must be set."
-            )
+    @staticmethod
+    def positive_int(value):
+        """Convert string to an integer greater than zero."""
+        number = int(value)
+        if number <= 0:
+            raise ValueError(f"{value} is not a positive integer")
+        return number
+
+    def require(self, key, cast=str):
+        """Read a required environment variable, exiting if it is unset or invalid."""
+        value = self.env.get(key)
+        if not value:
+            logging.error("%s must be set.", key)
             sys.exit(1)
-        if not all(self.openai.values()):
-            logging.error(
-                "OPENAI_API_KEY, OPENAI_MODEL & MODEL_MAX_TOKEN must be set."
-            )
+        return self.cast(key, value, cast)
+
+    def optional(self, key, default, cast=str):
+        """Read an optional environment variable, falling back to a default."""
+        return self.cast(key, self.env.get(key) or default, cast)
+
+    def cast(self, key, value, cast):
+        """Convert an environment variable value, exiting if it is invalid."""
+        try:
+            return cast(value)
+        except ValueError:
+            logging.error("%s has an invalid value: %s", key, value)
             sys.exit(1)
 
 
@@ -85,63 +153,212 @@ class FileHandler:
 
     @staticmethod
     def read_file(file_path):
-        """Read content from a file."""
+        """Read a file and return its content with each line prefixed by its line number."""
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
-                return file.readlines()
+                data = file.read()
         except OSError as e:
             logging.error("Error reading file %s: %s", file_path, e)
             return None
+        # Split on "\n" only: str.splitlines also breaks on form feeds and
+        # Unicode separators, which would shift numbers away from GitHub's.
+        lines = data.split('\n')
+        if lines[-1] == '':
+            lines.pop()
+        return "".join(f"{idx}: {line.rstrip()}\n" for idx, line in enumerate(lines, 1))
 
 
 class SpellChecker:
     """SpellChecker class to check spelling and grammar."""
 
-    def __init__(self, config):
+    SYSTEM_PROMPT = "You are a helpful assistant checking spelling and grammar."
+    PROMPT_TEMPLATE = (
+        "You are a helpful assistant that checks and corrects only spelling "
+        "and grammar issues in markdown files, without altering any other "
+        "content such as indentation, line numbers, or formatting.\n"
+        "The lines of each file are wrapped between '===FILE: <path>===' and "
+        "'===END===' markers.\n"
+        "Assume the default language is {language}.\n"
+        "For each line provided, identify the specific word with the issue "
+        "and provide its correction.\n"
+        "Return a JSON object of the form {{\"issues\": [...]}} where each issue "
+        "has the following fields, only if the category is not 'none':\n"
+        "- original_text: contains only the specific word in the line that has a "
+        "spelling or grammar issue\n"
+        "- suggested_text: contains the corrected word\n"
+        "- file_path: the path of the file the line belongs to\n"
+        "- line_number: the exact line number of the original md file\n"
+        "- category: either 'spelling issue', 'grammar issue', or 'both'\n\n"
+        "Only include entries where the category is 'spelling issue', 'grammar "
+        "issue', or 'both'.\n"
+        "If all lines are correct, return an empty issues list.\n\n"
+        "Here are the files:\n"
+    )
+
+    def __init__(self, config, client=None):
         self.config = config
-        self.client = OpenAI(api_key=config.openai['api_key'])
+        self.client = client if client is not None else OpenAI(api_key=config.openai['api_key'])
+        self.cache_dir = config.spell_check['cache_dir']
+        self.prompt_prefix = self.PROMPT_TEMPLATE.format(
+            language=config.spell_check['default_language']
+        )
 
-    def check_spelling_with_line_numbers(self, numbered_content):
-        """Check spelling and grammar using OpenAI API."""
+    def build_messages(self, numbered_files):
+        """Build the chat messages for a list of (file_path, numbered_content) pairs."""
+        file_blocks = "".join(
+            f"===FILE: {file_path}===\n{numbered_content}===END===\n"
+            for file_path, numbered_content in numbered_files
+        )
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": self.prompt_prefix + file_blocks}
+        ]
+
+    def build_request(self, numbered_files):
+        """Build deterministic, JSON-mode chat completion parameters for numbered files."""
+        return {
+            "model": self.config.openai['model'],
+            "messages": self.build_messages(numbered_files),
+            "max_tokens": self.config.openai['max_tokens'],
+            "seed": self.config.openai['seed'],
+            "temperature": 0,
+            "response_format": {"type": "json_object"}
+        }
+
+    def cache_key(self, request):
+        """Return the cache key for a chat completion request."""
+        payload = json.dumps(request, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def read_cache(self, key):
+        """Return a cached model response, or None on a miss."""
+        if not self.cache_dir:
+            return None
         try:
-            response = self.client.chat.completions.create(
-                model=self.config.openai['model'],
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant checking spelling and grammar."
-                    },
-                    {
-                        "role": "user",
-                        "content": (
-                            "You are a helpful assistant that checks and corrects only spelling "
-                            "and grammar issues in markdown files, without altering any other "
-                            "content such as indentation, line numbers, or formatting.\n"
-                            f"Assume the default language is {self.config.spell_check['default_language']}.\n"
-                            "For each line provided, identify the specific word with the issue "
-                            "and provide its correction.\n"
-                            "Return a JSON object with the following fields only if the category "
-                            "is not 'none':\n"
-                            "- original_text: contains only the specific word in the line that has a "
-                            "spelling or grammar issue\n"
-                            "- suggested_text: contains the corrected word\n"
-                            "- line_number: the exact line number of the original md file\n"
-                            "- category: either 'spelling issue', 'grammar issue', or 'both'\n\n"
-                            "Only include entries where the category is 'spelling issue', 'grammar "
-                            "issue', or 'both'.\n"
-                            "If all lines are correct, return a single object in a list with the message: "
-                            "'everything looks good to me 🎉'.\n\n"
-                            "Here are the lines:\n"
-                            f"{''.join(numbered_content)}"
-                        )
-                    }
-                ],
-                max_tokens=self.config.openai['max_tokens']
-            )
-            return response.choices[0].message.content
+            with open(os.path.join(self.cache_dir, f"{key}.json"), 'r', encoding='utf-8') as file:
+                return json.load(file)["content"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def write_cache(self, key, content):
+        """Atomically store a model response in the cache directory."""
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump({"content": content}, file)
+            os.replace(tmp_path, os.path.join(self.cache_dir, f"{key}.json"))
+        except OSError as e:
+            logging.warning("Failed to write cache entry %s: %s", key, e)
+
+    def create_completion(self, request):
+        """Create a chat completion, retrying without JSON mode if the model rejects it."""
+        try:
+            return self.client.chat.completions.create(**request)
+        except openai.BadRequestError as e:
+            if e.param != "response_format":
+                raise
+            logging.warning("Model rejected JSON mode (%s); retrying without it.", e)
+            request = {key: value for key, value in request.items() if key != "response_format"}
+            return self.client.chat.completions.create(**request)
+
+    def check_spelling_with_line_numbers(self, numbered_files):
+        """Check spelling and grammar for one or more files in one cached OpenAI API request."""
+        request = self.build_request(numbered_files)
+        key = self.cache_key(request)
+        cached = self.read_cache(key)
+        if cached is not None:
+            logging.info("Using cached result for %s.", [file_path for file_path, _ in numbered_files])
+            return cached
+        try:
+            response = self.create_completion(request)
+            choice = response.choices[0]
         except Exception as e:
             logging.error("Error during OpenAI API request: %s", e)
             return None
+        # Output cut off at max_tokens is used once but never replayed from the cache.
+        if choice.finish_reason == "stop":
+            self.write_cache(key, choice.message.content)
+        else:
+            logging.warning("Not caching response that ended with %s.", choice.finish_reason)
+        return choice.message.content
+
+    def check_spelling_batch(self, file_groups):
+        """Check groups of files with the OpenAI Batch API, returning (file_paths, result) pairs."""
+        results = []
+        keys = {}
+        lines = []
+        for index, group in enumerate(file_groups):
+            request = self.build_request(group)
+            keys[index] = self.cache_key(request)
+            cached = self.read_cache(keys[index])
+            if cached is not None:
+                results.append(([file_path for file_path, _ in group], cached))
+                continue
+            lines.append(json.dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": request
+            }))
+        if not lines:
+            return results
+
+        try:
+            batch_input = self.client.files.create(
+                file=("spell_check_batch.jsonl", "\n".join(lines).encode('utf-8')),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_input.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            batch = self.wait_for_batch(batch)
+            if batch.status != "completed":
+                logging.error("OpenAI batch %s ended with status %s.", batch.id, batch.status)
+                return results
+            output = self.client.files.content(batch.output_file_id).text
+        except Exception as e:
+            logging.error("Error during OpenAI batch request: %s", e)
+            return results
+
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json_loads(line)
+            except ValueError as e:
+                logging.error("Skipping malformed batch output line: %s", e)
+                continue
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                logging.error("Batch request for %s failed: %s", record.get("custom_id"), record.get("error"))
+                continue
+            index = int(record["custom_id"])
+            choice = response["body"]["choices"][0]
+            content = choice["message"]["content"]
+            if choice.get("finish_reason") == "stop":
+                self.write_cache(keys[index], content)
+            results.append(([file_path for file_path, _ in file_groups[index]], content))
+        return results
+
+    def wait_for_batch(self, batch):
+        """Poll a batch with exponential backoff until it finishes or times out."""
+        deadline = time.monotonic() + self.config.spell_check['batch_timeout'] * 60
+        delay = BATCH_POLL_INITIAL_DELAY
+        while batch.status not in BATCH_TERMINAL_STATUSES:
+            remaining = deadline - time.monotonic()
+            # Cancel rather than abandon, so the batch is not billed after the job gives up.
+            if remaining <= 0:
+                logging.error("OpenAI batch %s did not finish in time; cancelling it.", batch.id)
+                return self.client.batches.cancel(batch.id)
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, BATCH_POLL_MAX_DELAY)
+            batch = self.client.batches.retrieve(batch.id)
+        return batch
 
 
 class GitHubPRCommenter:
@@ -158,6 +375,19 @@ class GitHubPRCommenter:
             "Authorization": f"Bearer {self.token}",
             "Accept": "application/vnd.github.v3+json"
         }
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False
+            )
+        ))
+        self._commit_id = None
 
     def post_comment(self, file_path, line_number, message):
         """Post a comment on a PR."""
@@ -173,16 +403,70 @@ class GitHubPRCommenter:
             "side": "RIGHT",
             "line": line_number
         }
-        response = requests.post(self.api_url, headers=self.headers, json=data, timeout=10)
+        try:
+            response = self.session.post(
+                self.api_url,
+                data=json_dumps(data),
+                headers={"Content-Type": "application/json"},
+                timeout=10
+            )
+        except requests.RequestException as e:
+            logging.error("Failed to post comment: %s", e)
+            return
         if response.status_code == 201:
             logging.info("Successfully posted comment to %s on line %d.", file_path, line_number)
         else:
             logging.error("Failed to post comment: %s - %s", response.status_code, response.text)
 
+    def submit_review(self, comments):
+        """Post inline comments as a single PR review."""
+        if not comments:
+            return
+        commit_id = self.get_latest_commit()
+        if not commit_id:
+            logging.error("Cannot post review without a valid commit ID.")
+            return
+
+        reviews_url = f"https://api.github.com/repos/{self.repo}/pulls/{self.pr_number}/reviews"
+        data = {
+            "commit_id": commit_id,
+            "event": "COMMENT",
+            "comments": comments
+        }
+        try:
+            response = self.session.post(
+                reviews_url,
+                data=json_dumps(data),
+                headers={"Content-Type": "application/json"},
+                timeout=10
+            )
+        except requests.RequestException as e:
+            logging.error("Failed to post review: %s", e)
+            return
+        if response.status_code == 200:
+            logging.info("Successfully posted review with %d comments.", len(comments))
+            return
+        logging.error("Failed to post review: %s - %s", response.status_code, response.text)
+        # A 422 usually means one comment targets a line outside the diff;
+        # posting comments one by one lets the valid ones still land.
+        if response.status_code == 422:
+            for comment in comments:
+                self.post_comment(comment["path"], comment["line"], comment["body"])
+
     def get_latest_commit(self):
-        """Get the latest commit SHA for the PR."""
+        """Get the latest commit SHA for the PR, fetching it once per run."""
+        if self._commit_id is None:
+            self._commit_id = self._fetch_latest_commit()
+        return self._commit_id
+
+    def _fetch_latest_commit(self):
+        """Fetch the head commit SHA of the PR from the GitHub API."""
         pr_url = f"https://api.github.com/repos/{self.repo}/pulls/{self.pr_number}"
-        response = requests.get(pr_url, headers=self.headers, timeout=10)
+        try:
+            response = self.session.get(pr_url, timeout=10)
+        except requests.RequestException as e:
+            logging.error("Failed to get latest commit SHA: %s", e)
+            return None
         if response.status_code == 200:
             return response.json()['head']['sha']
         logging.error("Failed to get latest commit SHA: %s - %s", response.status_code, response.text)
@@ -190,19 +474,39 @@ class GitHubPRCommenter:
 
     def delete_existing_comments(self):
         """Delete comments made by the bot on the PR."""
-        comments_url = f"https://api.github.com/repos/{self.repo}/pulls/{self.pr_number}/comments"
-        response = requests.get(comments_url, headers=self.headers, timeout=10)
-        if response.status_code == 200:
-            for comment in response.json():
-                if comment['user']['login'] == 'github-actions[bot]':
-                    delete_url = f"https://api.github.com/repos/{self.repo}/pulls/comments/{comment['id']}"
-                    delete_response = requests.delete(delete_url, headers=self.headers, timeout=10)
-                    if delete_response.status_code == 204:
-                        logging.info("Deleted comment ID %d by github-actions[bot].", comment['id'])
-                    else:
-                        logging.error("Failed to delete comment ID %d: %s - %s", comment['id'], delete_response.status_code, delete_response.text)
+        comments_url = (
+            f"https://api.github.com/repos/{self.repo}/pulls/{self.pr_number}/comments?per_page=100"
+        )
+        comment_ids = []
+        while comments_url:
+            try:
+                response = self.session.get(comments_url, timeout=10)
+            except requests.RequestException as e:
+                logging.error("Failed to get comments: %s", e)
+                break
+            if response.status_code != 200:
+                logging.error("Failed to get comments: %s - %s", response.status_code, response.text)
+                break
+            comment_ids.extend(
+                comment['id'] for comment in response.json()
+                if comment['user']['login'] == 'github-actions[bot]'
+            )
+            comments_url = response.links.get('next', {}).get('url')
+        with concurrent.futures.ThreadPoolExecutor(max_workers=GITHUB_MAX_WORKERS) as executor:
+            list(executor.map(self.delete_comment, comment_ids))
+
+    def delete_comment(self, comment_id):
+        """Delete a single review comment by ID."""
+        delete_url = f"https://api.github.com/repos/{self.repo}/pulls/comments/{comment_id}"
+        try:
+            delete_response = self.session.delete(delete_url, timeout=10)
+        except requests.RequestException as e:
+            logging.error("Failed to delete comment ID %d: %s", comment_id, e)
+            return
+        if delete_response.status_code == 204:
+            logging.info("Deleted comment ID %d by github-actions[bot].", comment_id)
         else:
-            logging.error("Failed to get comments: %s - %s", response.status_code, response.text)
+            logging.error("Failed to delete comment ID %d: %s - %s", comment_id, delete_response.status_code, delete_response.text)
 
 
 class SpellCheckProcessor:
@@ -212,57 +516,126 @@ class SpellCheckProcessor:
         self.config = config
         self.spell_checker = SpellChecker(config)
         self.has_issues = False
+        self._pending_review_comments = []
+        self.fail_on = {
+            "spelling issue": config.spell_check["failOnSpelling"],
+            "grammar issue": config.spell_check["failOnGrammar"],
+            "both": config.spell_check["failOnSpelling"] or config.spell_check["failOnGrammar"]
+        }
         self.commenter = GitHubPRCommenter(
             self.config.github['repository'],
             self.config.github['pr_number'],
             self.config.github['token']
         )
 
-    def inject_line_numbers(self, lines):
-        """Inject line numbers into file content."""
-        return [f"{idx + 1}: {line.rstrip()}\n" for idx, line in enumerate(lines)]
+    def read_files(self):
+        """Read and number every configured file concurrently, skipping unreadable ones."""
+        file_paths = self.config.github['files']
+        max_workers = self.config.spell_check['concurrency']
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            contents = list(executor.map(FileHandler.read_file, file_paths))
+        numbered_files = []
+        for file_path, numbered_content in zip(file_paths, contents):
+            if numbered_content:
+                numbered_files.append((file_path, numbered_content))
+            else:
+                logging.error("Skipping file %s due to read error.", file_path)
+        return numbered_files
+
+    def group_files(self, numbered_files):
+        """Pack numbered files into prompt-sized groups."""
+        # Cap input at roughly max_tokens worth of characters so findings fit in the response.
+        limit = min(
+            self.config.spell_check['batch_chars'],
+            self.config.openai['max_tokens'] * CHARS_PER_TOKEN
+        )
+        groups = []
+        group, group_chars = [], 0
+        for file_path, numbered_content in numbered_files:
+            size = len(numbered_content)
+            if group and group_chars + size > limit:
+                groups.append(group)
+                group, group_chars = [], 0
+            group.append((file_path, numbered_content))
+            group_chars += size
+        if group:
+            groups.append(group)
+        return groups
+
+    def _check_group(self, group):
+        """Spell check a group of files, returning its file paths and result."""
+        file_paths = [file_path for file_path, _ in group]
+        return file_paths, self.spell_checker.check_spelling_with_line_numbers(group)
 
     def process_files(self):
         """Process files to check for spelling and grammar issues."""
         self.commenter.delete_existing_comments()
-        for file_path in self.config.github['files']:
-            file_lines = FileHandler.read_file(file_path)
-            if file_lines:
-                numbered_content = self.inject_line_numbers(file_lines)
-                result = self.spell_checker.check_spelling_with_line_numbers(numbered_content)
-                if result:
-                    self.post_inline_comments(result, file_path)
-            else:
-                logging.error("Skipping file %s due to read error.", file_path)
+        groups = self.group_files(self.read_files())
+        if self.config.spell_check['use_batch']:
+            results = self.spell_checker.check_spelling_batch(groups) if groups else []
+        else:
+            results = self.check_groups_concurrently(groups)
+        for file_paths, result in results:
+            if result:
+                self.post_inline_comments(result, file_paths)
+        self.commenter.submit_review(self._pending_review_comments)
         self.check_pr_status()
 
+    def check_groups_concurrently(self, groups):
+        """Yield (file_paths, result) pairs as concurrent spell checks complete."""
+        max_workers = self.config.spell_check['concurrency']
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._check_group, group) for group in groups]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+
     def check_pr_status(self):
         """Check the PR status based on found issues."""
         if self.has_issues:
             sys.exit(1)
         sys.exit(0)
 
-    def post_inline_comments(self, result, file_path):
-        """Post inline comments based on the result from the spell checker."""
+    def post_inline_comments(self, result, file_paths):
+        """Queue inline review comments based on the result from the spell checker."""
         try:
-            result_json = json.loads(result.strip('```json\n```'))
+            result_json = json_loads(strip_code_fence(result))
+            if isinstance(result_json, dict):
+                result_json = result_json.get("issues")
             if not isinstance(result_json, list):
                 logging.error("Result is not a list of issues.")
                 return
             for entry in result_json:
-                if "message" in entry:
+                if isinstance(entry, dict) and "message" in entry:
                     continue
-                line_number = entry.get("line_number")
-                category = entry.get("category")
-                original_text = entry.get("original_text")
-                suggested_text = entry.get("suggested_text")
-                message = f"**{category.capitalize()}**: `{original_text}`\n**Suggestion**: `{suggested_text}`"
-                self.commenter.post_comment(file_path, line_number, message)
-
-                if category == "spelling issue" and self.config.spell_check["failOnSpelling"]:
-                    self.has_issues = True
-                elif category == "grammar issue" and self.config.spell_check["failOnGrammar"]:
+                try:
+                    line_number, category, original_text, suggested_text = ENTRY_FIELDS(entry)
+                except (KeyError, TypeError):
+                    line_number, category = None, None
+                # bool is an int subclass, but GitHub rejects true/false as a line.
+                valid_line = isinstance(line_number, int) and not isinstance(line_number, bool)
+                if not isinstance(category, str) or not valid_line:
+                    logging.error("Skipping malformed entry: %s", entry)
+                    continue
+                file_path = entry.get("file_path")
+                # A single-file request may omit file_path; attribute it to that file.
+                if file_path not in file_paths:
+                    if len(file_paths) != 1:
+                        logging.error("Skipping entry for unknown file %s.", file_path)
+                        continue
+                    file_path = file_paths[0]
+                message = COMMENT_TEMPLATE(
+                    label=CATEGORY_LABELS.get(category) or category.capitalize(),
+                    original=original_text,
+                    suggested=suggested_text
+                )
+                if self.fail_on.get(category):
                     self.has_issues = True
+                self._pending_review_comments.append({
+                    "path": file_path,
+                    "line": line_number,
+                    "side": "RIGHT",
+                    "body": message
+                })
         except json.JSONDecodeError as error:
             logging.error(f"Failed to decode JSON: {error}")
 
@@ -0,0 +1,11 @@
+import logging
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolate_global_state():
+    """Restore root logger handlers after each test"""
+    root_handlers = logging.root.handlers[:]
+    yield
+    logging.root.handlers[:] = root_handlers
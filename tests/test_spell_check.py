@@ -1,33 +1,115 @@
+import os
 import unittest
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch, MagicMock, mock_open, DEFAULT
 import logging
-from src.spell_check import Logger, FileHandler, SpellChecker, GitHubPRCommenter, SpellCheckProcessor
+import json
+import tempfile
+from types import SimpleNamespace
+import httpx
+import openai
+import requests
+import requests_mock
+from src.spell_check import (
+    Config, Logger, FileHandler, SpellChecker, GitHubPRCommenter, SpellCheckProcessor, strip_code_fence
+)
+
+PR_URL = "https://api.github.com/repos/owner/repo/pulls/123"
+COMMENTS_URL = f"{PR_URL}/comments"
+REVIEWS_URL = f"{PR_URL}/reviews"
+# Config sets its sections as instance attributes, so spec_set takes their names.
+CONFIG_ATTRIBUTES = ['github', 'spell_check', 'openai', 'log']
+ISSUES_JSON = '[{"original_text": "speling", "suggested_text": "spelling", "line_number": 2, ' \
+              '"category": "spelling issue"}]'
+ISSUES = json.loads(ISSUES_JSON)
+ISSUES_COMPLETION = SimpleNamespace(choices=[
+    SimpleNamespace(message=SimpleNamespace(content=ISSUES_JSON), finish_reason='stop')
+])
+MOCK_FILE = mock_open(read_data="line1\nline2")
+
+
+def bad_request(param, code):
+    """Build the error OpenAI raises for a 400 response naming a parameter"""
+    return openai.BadRequestError(
+        f"Invalid parameter: {param}",
+        response=httpx.Response(400, request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')),
+        body={'param': param, 'code': code, 'type': 'invalid_request_error'}
+    )
+
+
+def review_comments(lines):
+    """Build review comments on file.md for the given line numbers"""
+    return [{'path': 'file.md', 'line': line, 'side': 'RIGHT', 'body': 'Test message'} for line in lines]
+
+
+class TestConfig(unittest.TestCase):
+    """Test cases for Config class"""
+
+    ENV = {
+        'INPUT_GITHUB_REPOSITORY': 'owner/repo',
+        'INPUT_GITHUB_TOKEN': 'dummy_token',
+        'INPUT_PR_NUMBER': '123',
+        'INPUT_FILES': 'file1.md,file2.md',
+        'INPUT_OPENAI_API_KEY': 'dummy_key',
+        'INPUT_OPENAI_MODEL': 'gpt-4o',
+        'INPUT_MODEL_MAX_TOKEN': '100'
+    }
+
+    def test_config_reads_environment(self):
+        """Test required and optional inputs are read and cast"""
+        with patch.dict(os.environ, self.ENV, clear=True):
+            config = Config()
+        self.assertEqual(config.github['files'], ['file1.md', 'file2.md'])
+        self.assertEqual(config.openai['max_tokens'], 100)
+        self.assertEqual(config.spell_check['concurrency'], 8)
+
+    def test_config_missing_max_token_exits(self):
+        """Test a missing MODEL_MAX_TOKEN exits cleanly instead of raising TypeError"""
+        env = {key: value for key, value in self.ENV.items() if key != 'INPUT_MODEL_MAX_TOKEN'}
+        with patch.dict(os.environ, env, clear=True):
+            with self.assertLogs(level='ERROR'), self.assertRaises(SystemExit) as cm:
+                Config()
+        self.assertEqual(cm.exception.code, 1)
+
+    def test_config_non_positive_concurrency_exits(self):
+        """Test a zero or negative CONCURRENCY exits instead of failing in the thread pool"""
+        for value in ('0', '-2'):
+            with self.subTest(value=value), patch.dict(os.environ, {**self.ENV, 'INPUT_CONCURRENCY': value}, clear=True):
+                with self.assertLogs(level='ERROR') as log, self.assertRaises(SystemExit) as cm:
+                    Config()
+                self.assertEqual(cm.exception.code, 1)
+                self.assertIn('INPUT_CONCURRENCY', log.output[0])
+
 
 class TestLogger(unittest.TestCase):
     """Test cases for Logger class"""
 
-    @patch('logging.basicConfig')
+    @patch('logging.basicConfig', autospec=True)
     def test_logger_initialization(self, mock_basicconfig):
         """Test Logger initialization with proper logging configuration"""
-        mock_config = MagicMock()
+        mock_config = MagicMock(spec_set=CONFIG_ATTRIBUTES)
         mock_config.log = {'log_level': 'DEBUG'}
         logger = Logger(mock_config)
-        mock_basicconfig.assert_called_once_with(
-            level=logging.DEBUG,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        self.assertEqual(mock_basicconfig.call_count, 1)
+        self.assertEqual(mock_basicconfig.call_args.kwargs, {
+            'level': logging.DEBUG,
+            'format': '%(asctime)s - %(levelname)s - %(message)s'
+        })
         self.assertIsNotNone(logger)
 
 
 class TestFileHandler(unittest.TestCase):
     """Test cases for FileHandler class"""
 
-    @patch("builtins.open", new_callable=mock_open, read_data="line1\nline2")
-    def test_read_file_success(self, mock_file):
+    def setUp(self):
+        """Clear calls recorded on the shared file mock"""
+        MOCK_FILE.reset_mock()
+
+    @patch("builtins.open", MOCK_FILE)
+    def test_read_file_success(self):
         """Test file reading functionality for success"""
         content = FileHandler.read_file("dummy_path")
-        mock_file.assert_called_once_with("dummy_path", 'r', encoding='utf-8')
-        self.assertEqual(content, ["line1\n", "line2"])
+        MOCK_FILE.assert_called_once_with("dummy_path", 'r', encoding='utf-8')
+        self.assertEqual(content, "1: line1\n2: line2\n")
 
     @patch("builtins.open", side_effect=FileNotFoundError)
     def test_read_file_failure(self, mock_file):
@@ -37,48 +119,197 @@ class TestFileHandler(unittest.TestCase):
         self.assertIsNone(content)
 
 
+class TestStripCodeFence(unittest.TestCase):
+    """Test cases for strip_code_fence helper"""
+
+    def test_strip_code_fence_keeps_payload_edges(self):
+        """Test only the fence is removed, not matching characters of the payload"""
+        self.assertEqual(strip_code_fence('```json\n["json"]\n```'), '["json"]')
+        self.assertEqual(strip_code_fence('```\n"son"\n```'), '"son"')
+        self.assertEqual(strip_code_fence('[]'), '[]')
+
+
 class TestSpellChecker(unittest.TestCase):
     """Test cases for SpellChecker class"""
 
-    @patch('openai.OpenAI', side_effect=Exception('API Error'))
-    def test_check_spelling_api_failure(self, mock_openai):
-        """Test spell checker handling API failure"""
-        mock_config = MagicMock()
-        mock_config.openai = {
+    def setUp(self):
+        """Build the config and OpenAI client mocks shared by the tests in this class"""
+        # The OpenAI client creates its resources in __init__, so spec takes their names.
+        self.mock_client = MagicMock(spec=['chat', 'files', 'batches'])
+        self.mock_config = MagicMock(spec_set=CONFIG_ATTRIBUTES)
+        self.mock_config.openai = {
             'api_key': 'dummy_key',
             'model': 'text-davinci-003',
-            'max_tokens': 100
+            'max_tokens': 100,
+            'seed': 42
         }
-        spell_checker = SpellChecker(mock_config)
-        numbered_content = ["1: speling\n"]
-        result = spell_checker.check_spelling_with_line_numbers(numbered_content)
+        self.mock_config.spell_check = {'default_language': 'en-US', 'cache_dir': '', 'batch_timeout': 240}
+
+    def test_check_spelling_with_line_numbers(self):
+        """Test a successful request returns the model output"""
+        self.mock_client.configure_mock(**{'chat.completions.create.return_value': ISSUES_COMPLETION})
+        spell_checker = SpellChecker(self.mock_config, client=self.mock_client)
+
+        result = spell_checker.check_spelling_with_line_numbers([("file1.md", "1: line1\n2: speling\n")])
+
+        self.assertEqual(json.loads(result), ISSUES)
+        request = self.mock_client.chat.completions.create.call_args[1]
+        self.assertIn("===FILE: file1.md===\n1: line1\n2: speling\n===END===", request['messages'][1]['content'])
+        self.assertEqual(request['temperature'], 0)
+        self.assertEqual(request['response_format'], {'type': 'json_object'})
+
+    def test_check_spelling_retries_without_json_mode(self):
+        """Test a model that rejects JSON mode is asked again without response_format"""
+        rejected = bad_request('response_format', None)
+        self.mock_client.chat.completions.create.side_effect = [rejected, ISSUES_COMPLETION]
+        spell_checker = SpellChecker(self.mock_config, client=self.mock_client)
+
+        with self.assertLogs(level='WARNING'):
+            result = spell_checker.check_spelling_with_line_numbers([("file1.md", "1: line1\n2: speling\n")])
+
+        self.assertEqual(json.loads(result), ISSUES)
+        first, second = self.mock_client.chat.completions.create.call_args_list
+        self.assertIn('response_format', first[1])
+        self.assertNotIn('response_format', second[1])
+
+    def test_check_spelling_unrelated_bad_request_is_not_retried(self):
+        """Test a 400 that is not about response_format fails without a second request"""
+        self.mock_client.chat.completions.create.side_effect = bad_request('messages', 'context_length_exceeded')
+        spell_checker = SpellChecker(self.mock_config, client=self.mock_client)
+
+        with self.assertLogs(level='ERROR'):
+            result = spell_checker.check_spelling_with_line_numbers([("file1.md", "1: speling\n")])
+
         self.assertIsNone(result)
+        self.mock_client.chat.completions.create.assert_called_once()
+
+    def test_check_spelling_api_failure(self):
+        """Test spell checker handling API failure"""
+        self.mock_client.chat.completions.create.side_effect = Exception('API Error')
+        spell_checker = SpellChecker(self.mock_config, client=self.mock_client)
+        numbered_files = [("file1.md", "1: speling\n")]
+        result = spell_checker.check_spelling_with_line_numbers(numbered_files)
+        self.assertIsNone(result)
+
+    def test_check_spelling_batch(self):
+        """Test batch results are routed back to files by custom_id"""
+        spell_checker = SpellChecker(self.mock_config, client=self.mock_client)
+        self.mock_client.batches.create.return_value.status = 'completed'
+        self.mock_client.files.content.return_value.text = json.dumps({
+            'custom_id': '0',
+            'response': {
+                'status_code': 200,
+                'body': {'choices': [{'message': {'content': '[]'}, 'finish_reason': 'stop'}]}
+            }
+        })
+
+        result = spell_checker.check_spelling_batch([[('file1.md', "1: speling\n")]])
+
+        self.assertEqual(result, [(['file1.md'], '[]')])
+        upload = self.mock_client.files.create.call_args[1]
+        self.assertEqual(upload['purpose'], 'batch')
+        self.assertEqual(json.loads(upload['file'][1])['custom_id'], '0')
+
+    def test_check_spelling_batch_skips_malformed_lines(self):
+        """Test an unparsable output line is skipped without losing the others"""
+        spell_checker = SpellChecker(self.mock_config, client=self.mock_client)
+        self.mock_client.batches.create.return_value.status = 'completed'
+        self.mock_client.files.content.return_value.text = '{"custom_id": "0", "resp\n' + json.dumps({
+            'custom_id': '1',
+            'response': {
+                'status_code': 200,
+                'body': {'choices': [{'message': {'content': '[]'}, 'finish_reason': 'stop'}]}
+            }
+        })
+
+        with self.assertLogs(level='ERROR'):
+            result = spell_checker.check_spelling_batch([
+                [('file1.md', "1: speling\n")],
+                [('file2.md', "1: speling\n")]
+            ])
+
+        self.assertEqual(result, [(['file2.md'], '[]')])
+
+    @patch('src.spell_check.time')
+    def test_wait_for_batch_cancels_after_timeout(self, mock_time):
+        """Test a batch still running at the deadline is cancelled"""
+        mock_time.monotonic.side_effect = [0, 0, 240 * 60]
+        self.mock_client.batches.retrieve.return_value = SimpleNamespace(id='batch_1', status='in_progress')
+        self.mock_client.batches.cancel.return_value.status = 'cancelling'
+        spell_checker = SpellChecker(self.mock_config, client=self.mock_client)
+
+        with self.assertLogs(level='ERROR'):
+            batch = spell_checker.wait_for_batch(SimpleNamespace(id='batch_1', status='validating'))
+
+        self.assertEqual(batch.status, 'cancelling')
+        self.mock_client.batches.cancel.assert_called_once_with('batch_1')
+        mock_time.sleep.assert_called_once_with(5)
+
+    def test_check_spelling_uses_disk_cache(self):
+        """Test an unchanged request is served from the cache directory"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.mock_config.spell_check['cache_dir'] = cache_dir
+            spell_checker = SpellChecker(self.mock_config, client=self.mock_client)
+            self.mock_client.configure_mock(**{'chat.completions.create.return_value': ISSUES_COMPLETION})
+            numbered_files = [("file1.md", "1: speling\n")]
+
+            first = spell_checker.check_spelling_with_line_numbers(numbered_files)
+            second = spell_checker.check_spelling_with_line_numbers(numbered_files)
+
+        self.assertEqual(json.loads(first), ISSUES)
+        self.assertEqual(json.loads(second), ISSUES)
+        self.mock_client.chat.completions.create.assert_called_once()
+
+    def test_check_spelling_does_not_cache_truncated_response(self):
+        """Test output cut off at max_tokens is requested again instead of replayed"""
+        truncated = SimpleNamespace(choices=[
+            SimpleNamespace(message=SimpleNamespace(content='{"issues": [{"orig'), finish_reason='length')
+        ])
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.mock_config.spell_check['cache_dir'] = cache_dir
+            spell_checker = SpellChecker(self.mock_config, client=self.mock_client)
+            self.mock_client.configure_mock(**{'chat.completions.create.return_value': truncated})
+            numbered_files = [("file1.md", "1: speling\n")]
+
+            spell_checker.check_spelling_with_line_numbers(numbered_files)
+            spell_checker.check_spelling_with_line_numbers(numbered_files)
+
+            self.assertEqual(os.listdir(cache_dir), [])
+        self.assertEqual(self.mock_client.chat.completions.create.call_count, 2)
 
 
 class TestGitHubPRCommenter(unittest.TestCase):
     """Test cases for GitHubPRCommenter class"""
 
-    @patch('requests.post')
-    @patch('requests.get')
-    def test_post_comment_success(self, mock_get, mock_post):
-        """Test successful posting of comment on PR"""
-        mock_get.return_value.json.return_value = {'head': {'sha': 'dummy_sha'}}
-        mock_get.return_value.status_code = 200
-        mock_post.return_value.status_code = 201
+    def setUp(self):
+        """Register the GitHub API responses shared by the tests in this class"""
+        self.requests_mock = requests_mock.Mocker()
+        self.requests_mock.start()
+        self.addCleanup(self.requests_mock.stop)
+        self.requests_mock.get(PR_URL, json={'head': {'sha': 'dummy_sha'}})
+        self.requests_mock.post(COMMENTS_URL, status_code=201)
+        self.requests_mock.post(REVIEWS_URL, status_code=200)
+
+    def requests_to(self, method, url):
+        """Return the recorded requests for a method and URL without query string"""
+        return [
+            request for request in self.requests_mock.request_history
+            if request.method == method and request.url.split('?')[0] == url
+        ]
 
+    def test_post_comment_success(self):
+        """Test successful posting of comment on PR"""
         commenter = GitHubPRCommenter("owner/repo", "123", "dummy_token")
         commenter.post_comment("file.md", 1, "Test message")
 
-        mock_post.assert_called_once()
-        self.assertEqual(mock_post.call_args[1]['json']['body'], "Test message")
+        self.assertEqual(len(self.requests_to('GET', PR_URL)), 1)
+        posts = self.requests_to('POST', COMMENTS_URL)
+        self.assertEqual(len(posts), 1)
+        self.assertEqual(posts[0].json()['body'], "Test message")
 
-    @patch('requests.post')
-    @patch('requests.get')
-    def test_post_comment_failure(self, mock_get, mock_post):
+    def test_post_comment_failure(self):
         """Test failure in posting comment on PR"""
-        mock_get.return_value.json.return_value = {'head': {'sha': 'dummy_sha'}}
-        mock_get.return_value.status_code = 200
-        mock_post.return_value.status_code = 400
+        self.requests_mock.post(COMMENTS_URL, status_code=400)
 
         with self.assertLogs(level='ERROR') as log:
             commenter = GitHubPRCommenter("owner/repo", "123", "dummy_token")
@@ -86,69 +317,190 @@ class TestGitHubPRCommenter(unittest.TestCase):
 
             self.assertIn('Failed to post comment', log.output[0])
 
+    def test_post_comment_reuses_commit(self):
+        """Test the head commit is fetched once for several comments"""
+        commenter = GitHubPRCommenter("owner/repo", "123", "dummy_token")
+        commenter.post_comment("file.md", 1, "First message")
+        commenter.post_comment("file.md", 2, "Second message")
+
+        self.assertEqual(len(self.requests_to('GET', PR_URL)), 1)
+        self.assertEqual(len(self.requests_to('POST', COMMENTS_URL)), 2)
+
+    def test_submit_review_batched(self):
+        """Test all comments are posted in one review request regardless of their number"""
+        for count in (1, 5, 50):
+            with self.subTest(count=count):
+                self.requests_mock.reset_mock()
+                comments = review_comments(range(1, count + 1))
+
+                commenter = GitHubPRCommenter("owner/repo", "123", "dummy_token")
+                commenter.submit_review(comments)
+
+                self.assertEqual(len(self.requests_to('GET', PR_URL)), 1)
+                reviews = self.requests_to('POST', REVIEWS_URL)
+                self.assertEqual(len(reviews), 1)
+                self.assertEqual(reviews[0].json()['commit_id'], 'dummy_sha')
+                self.assertEqual(reviews[0].json()['comments'], comments)
+                self.assertEqual(self.requests_to('POST', COMMENTS_URL), [])
+
+    def test_submit_review_without_comments_skips_requests(self):
+        """Test no API calls are made when there is nothing to post"""
+        commenter = GitHubPRCommenter("owner/repo", "123", "dummy_token")
+        commenter.submit_review([])
+
+        self.assertEqual(self.requests_mock.call_count, 0)
+
+    def test_submit_review_falls_back_to_single_comments(self):
+        """Test a rejected review is retried as individual comments"""
+        self.requests_mock.post(REVIEWS_URL, status_code=422)
+        comments = review_comments((1, 2))
+
+        commenter = GitHubPRCommenter("owner/repo", "123", "dummy_token")
+        with self.assertLogs(level='ERROR'):
+            commenter.submit_review(comments)
+
+        self.assertEqual(len(self.requests_to('POST', REVIEWS_URL)), 1)
+        self.assertEqual(len(self.requests_to('POST', COMMENTS_URL)), 2)
+
+    def test_submit_review_connection_error_is_logged(self):
+        """Test a connection error on the review or fallback comments is logged instead of raised"""
+        cases = [
+            # reviews response, comments response, expected log messages
+            ({'exc': requests.exceptions.ConnectionError}, {'status_code': 201}, ['Failed to post review']),
+            ({'status_code': 422}, {'exc': requests.exceptions.ConnectionError},
+             ['Failed to post review'] + ['Failed to post comment'] * 2),
+        ]
+        for review_response, comment_response, expected_messages in cases:
+            with self.subTest(review_response=review_response, comment_response=comment_response):
+                self.requests_mock.post(REVIEWS_URL, **review_response)
+                self.requests_mock.post(COMMENTS_URL, **comment_response)
+                commenter = GitHubPRCommenter("owner/repo", "123", "dummy_token")
+
+                with self.assertLogs(level='ERROR') as log:
+                    commenter.submit_review(review_comments((1, 2)))
+
+                self.assertEqual(len(log.output), len(expected_messages))
+                for output, message in zip(log.output, expected_messages):
+                    self.assertIn(message, output)
+
+    def test_session_carries_auth_headers(self):
+        """Test the shared session is preconfigured with the auth headers"""
+        commenter = GitHubPRCommenter("owner/repo", "123", "dummy_token")
+        self.assertEqual(commenter.session.headers['Authorization'], "Bearer dummy_token")
+        self.assertIn("https://", commenter.session.adapters)
+
+    def test_persistent_server_error_is_logged(self):
+        """Test a 503 that outlasts the retries is logged instead of raised"""
+        # Exhausted retries return the last response; RetryError covers any
+        # adapter that still raises once retries run out.
+        cases = [{'status_code': 503}, {'exc': requests.exceptions.RetryError}]
+        for response in cases:
+            with self.subTest(response=response):
+                self.requests_mock.get(PR_URL, **response)
+                self.requests_mock.get(f"{COMMENTS_URL}?per_page=100", **response)
+                commenter = GitHubPRCommenter("owner/repo", "123", "dummy_token")
+                self.assertFalse(commenter.session.adapters["https://"].max_retries.raise_on_status)
+
+                with self.assertLogs(level='ERROR') as log:
+                    self.assertIsNone(commenter.get_latest_commit())
+                    commenter.delete_existing_comments()
+
+                self.assertIn('Failed to get latest commit SHA', log.output[0])
+                self.assertIn('Failed to get comments', log.output[1])
+
+    def test_delete_existing_comments_follows_pages(self):
+        """Test bot comments are collected across pages and deleted"""
+        second_page_url = f"{COMMENTS_URL}?per_page=100&page=2"
+        self.requests_mock.get(
+            f"{COMMENTS_URL}?per_page=100",
+            json=[
+                {'id': 1, 'user': {'login': 'github-actions[bot]'}},
+                {'id': 2, 'user': {'login': 'someone'}}
+            ],
+            headers={'Link': f'<{second_page_url}>; rel="next"'}
+        )
+        self.requests_mock.get(second_page_url, json=[{'id': 3, 'user': {'login': 'github-actions[bot]'}}])
+        self.requests_mock.delete(requests_mock.ANY, status_code=204)
+
+        commenter = GitHubPRCommenter("owner/repo", "123", "dummy_token")
+        commenter.delete_existing_comments()
+
+        self.assertEqual(len(self.requests_to('GET', COMMENTS_URL)), 2)
+        deleted = sorted(
+            request.url for request in self.requests_mock.request_history if request.method == 'DELETE'
+        )
+        self.assertEqual(deleted, [
+            "https://api.github.com/repos/owner/repo/pulls/comments/1",
+            "https://api.github.com/repos/owner/repo/pulls/comments/3"
+        ])
+
 
 class TestSpellCheckProcessor(unittest.TestCase):
     """Test cases for SpellCheckProcessor class"""
 
-    @patch('src.spell_check.FileHandler.read_file', return_value=["line1\n", "speling\n"])
-    @patch('src.spell_check.SpellChecker.check_spelling_with_line_numbers')
-    @patch('src.spell_check.GitHubPRCommenter.post_comment')
-    @patch('src.spell_check.GitHubPRCommenter.delete_existing_comments')
-    def test_process_files(self, mock_delete_comments, mock_post_comment, mock_check_spelling, mock_read_file):
-        """Test spell check processing for files"""
-        mock_config = MagicMock()
-        mock_config.github = {
-            'repository': 'owner/repo',
-            'pr_number': '123',
-            'token': 'dummy_token',
-            'files': ['file1.md']
-        }
-        mock_check_spelling.return_value = '[{"original_text": "speling", "suggested_text": ' \
-                                           '"spelling", "line_number": 2, "category": "spelling issue"}]'
-        processor = SpellCheckProcessor(mock_config)
+    @classmethod
+    def setUpClass(cls):
+        """Bind the class under test once for all tests"""
+        cls.ProcessorCls = SpellCheckProcessor
 
-        with self.assertRaises(SystemExit) as cm:
-            processor.process_files()
-        self.assertEqual(cm.exception.code, 1)
-        mock_delete_comments.assert_called_once()
-        mock_post_comment.assert_called_once()
-
-    @patch('src.spell_check.FileHandler.read_file', return_value=None)
-    @patch('src.spell_check.GitHubPRCommenter.delete_existing_comments')
-    def test_process_files_file_read_failure(self, mock_delete_comments, mock_read_file):
-        """Test file read failure handling"""
-        mock_config = MagicMock()
-        mock_config.github = {
+    def setUp(self):
+        """Build the config mock shared by the tests in this class"""
+        self.mock_config = MagicMock(spec_set=CONFIG_ATTRIBUTES)
+        self.mock_config.github = {
             'repository': 'owner/repo',
             'pr_number': '123',
             'token': 'dummy_token',
             'files': ['file1.md']
         }
-        processor = SpellCheckProcessor(mock_config)
+        self.mock_config.spell_check = {
+            'failOnSpelling': True,
+            'failOnGrammar': False,
+            'default_language': 'en-US',
+            'concurrency': 2,
+            'use_batch': False,
+            'batch_timeout': 240,
+            'batch_chars': 12000,
+            'cache_dir': ''
+        }
+        self.mock_config.openai = {
+            'api_key': 'dummy_key',
+            'model': 'text-davinci-003',
+            'max_tokens': 100,
+            'seed': 42
+        }
 
-        with self.assertRaises(SystemExit) as cm:
-            processor.process_files()
-        self.assertEqual(cm.exception.code, 0)
-        mock_delete_comments.assert_called_once()
-
-    @patch('src.spell_check.FileHandler.read_file', return_value=["line1\n", "speling\n"])
-    @patch('src.spell_check.SpellChecker.check_spelling_with_line_numbers')
-    @patch('src.spell_check.GitHubPRCommenter.post_comment')
-    @patch('src.spell_check.GitHubPRCommenter.delete_existing_comments')
-    def test_process_files_check_pr_status_exit(self, mock_delete_comments, mock_post_comment, 
-                                                mock_check_spelling, mock_read_file):
+    def test_process_files(self):
+        """Test spell check processing and exit code for readable and unreadable files"""
+        cases = [
+            # read_file result, spell check result, API calls, exit code, commented lines
+            ("1: line1\n2: speling\n", ISSUES_JSON, 1, 1, [ISSUES[0]['line_number']]),
+            (None, None, 0, 0, []),
+        ]
+        for read_return, check_return, check_calls, expected_code, expected_lines in cases:
+            with self.subTest(read_return=read_return), patch.multiple(
+                'src.spell_check', FileHandler=DEFAULT, SpellChecker=DEFAULT, GitHubPRCommenter=DEFAULT
+            ) as mocks:
+                mocks['FileHandler'].read_file.return_value = read_return
+                spell_checker = mocks['SpellChecker'].return_value
+                spell_checker.check_spelling_with_line_numbers.return_value = check_return
+                commenter = mocks['GitHubPRCommenter'].return_value
+                processor = self.ProcessorCls(self.mock_config)
+
+                with self.assertRaises(SystemExit) as cm:
+                    processor.process_files()
+                self.assertEqual(cm.exception.code, expected_code)
+                commenter.delete_existing_comments.assert_called_once()
+                self.assertEqual(spell_checker.check_spelling_with_line_numbers.call_count, check_calls)
+                comments = commenter.submit_review.call_args[0][0]
+                self.assertEqual([comment['line'] for comment in comments], expected_lines)
+
+    @patch.multiple('src.spell_check', FileHandler=DEFAULT, SpellChecker=DEFAULT, GitHubPRCommenter=DEFAULT)
+    def test_process_files_check_pr_status_exit(self, **mocks):
         """Test PR status exit during spell check process"""
-        mock_config = MagicMock()
-        mock_config.github = {
-            'repository': 'owner/repo',
-            'pr_number': '123',
-            'token': 'dummy_token',
-            'files': ['file1.md']
-        }
-        mock_check_spelling.return_value = '[{"original_text": "speling", "suggested_text": ' \
-                                           '"spelling", "line_number": 2, "category": "spelling issue"}]'
+        mocks['FileHandler'].read_file.return_value = "1: line1\n2: speling\n"
+        mocks['SpellChecker'].return_value.check_spelling_with_line_numbers.return_value = ISSUES_JSON
 
-        processor = SpellCheckProcessor(mock_config)
+        processor = self.ProcessorCls(self.mock_config)
 
         with patch.object(processor, 'check_pr_status', side_effect=SystemExit(1)):
             with self.assertRaises(SystemExit) as cm:
@@ -156,6 +508,81 @@ class TestSpellCheckProcessor(unittest.TestCase):
 
             self.assertEqual(cm.exception.code, 1)
 
+    @patch.multiple('src.spell_check', FileHandler=DEFAULT, SpellChecker=DEFAULT, GitHubPRCommenter=DEFAULT)
+    def test_process_files_packs_files_into_one_request(self, **mocks):
+        """Test small files share one request and entries are routed by file_path"""
+        self.mock_config.github['files'] = ['file1.md', 'file2.md']
+        mocks['FileHandler'].read_file.return_value = "1: speling\n"
+        check_spelling = mocks['SpellChecker'].return_value.check_spelling_with_line_numbers
+        check_spelling.return_value = '{"issues": [{"file_path": "file2.md", "original_text": "speling", ' \
+                                      '"suggested_text": "spelling", "line_number": 1, ' \
+                                      '"category": "spelling issue"}]}'
+        submit_review = mocks['GitHubPRCommenter'].return_value.submit_review
+        processor = self.ProcessorCls(self.mock_config)
+
+        with self.assertRaises(SystemExit):
+            processor.process_files()
+        check_spelling.assert_called_once()
+        self.assertEqual(len(check_spelling.call_args[0][0]), 2)
+        submit_review.assert_called_once()
+        comments = submit_review.call_args[0][0]
+        self.assertEqual([comment['path'] for comment in comments], ['file2.md'])
+
+    @patch.multiple('src.spell_check', FileHandler=DEFAULT, SpellChecker=DEFAULT, GitHubPRCommenter=DEFAULT)
+    def test_process_files_both_category_exit_code(self, **mocks):
+        """Test a 'both' finding fails the run when either fail flag is set"""
+        mocks['FileHandler'].read_file.return_value = "1: line1\n2: speling\n"
+        mocks['SpellChecker'].return_value.check_spelling_with_line_numbers.return_value = json.dumps(
+            [{**ISSUES[0], 'category': 'both'}]
+        )
+        cases = [
+            # failOnSpelling, failOnGrammar, exit code
+            (False, False, 0),
+            (True, False, 1),
+            (False, True, 1),
+            (True, True, 1),
+        ]
+        for fail_on_spelling, fail_on_grammar, expected_code in cases:
+            with self.subTest(failOnSpelling=fail_on_spelling, failOnGrammar=fail_on_grammar):
+                self.mock_config.spell_check['failOnSpelling'] = fail_on_spelling
+                self.mock_config.spell_check['failOnGrammar'] = fail_on_grammar
+                processor = self.ProcessorCls(self.mock_config)
+
+                with self.assertRaises(SystemExit) as cm:
+                    processor.process_files()
+                self.assertEqual(cm.exception.code, expected_code)
+
+    @patch.multiple('src.spell_check', SpellChecker=DEFAULT, GitHubPRCommenter=DEFAULT)
+    def test_post_inline_comments_skips_malformed_entries(self, **_mocks):
+        """Test malformed entries are skipped without dropping the valid ones"""
+        result = json.dumps({'issues': [
+            5,
+            'speling',
+            {**ISSUES[0], 'category': None},
+            {'line_number': 1, 'category': 'spelling issue'},
+            {**ISSUES[0], 'line_number': '3'},
+            {**ISSUES[0], 'line_number': None},
+            {**ISSUES[0], 'line_number': True},
+            ISSUES[0]
+        ]})
+        processor = self.ProcessorCls(self.mock_config)
+
+        with self.assertLogs(level='ERROR') as log:
+            processor.post_inline_comments(result, ['file1.md'])
+
+        self.assertEqual(len(log.output), 7)
+        self.assertEqual([comment['line'] for comment in processor._pending_review_comments], [2])
+        self.assertTrue(processor.has_issues)
+
+    @patch.multiple('src.spell_check', SpellChecker=DEFAULT, GitHubPRCommenter=DEFAULT)
+    def test_group_files_leaves_room_for_max_tokens(self, **_mocks):
+        """Test groups are split when their size would outgrow the response budget"""
+        numbered_files = [('file1.md', "1: " + "a" * 300), ('file2.md', "1: " + "b" * 300)]
+        for max_tokens, group_count in ((100, 2), (16000, 1)):
+            with self.subTest(max_tokens=max_tokens):
+                self.mock_config.openai['max_tokens'] = max_tokens
+                processor = self.ProcessorCls(self.mock_config)
+                self.assertEqual(len(processor.group_files(numbered_files)), group_count)
 
 if __name__ == '__main__':
     unittest.main()